@@ -0,0 +1,116 @@
+"""Нагрузочный тест API: пропускная способность в зависимости от числа воркеров
+
+Запуск из корня проекта (нужна заполненная БД из DATABASE_URL):
+
+    python api/benchmark.py [--workers 1 2 4] [--duration 10] [--clients 16]
+
+Для каждого значения API_WORKERS запускается api/main.py, после чего несколько
+процессов-клиентов опрашивают указанные endpoints в течение duration секунд.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_workers() -> List[int]:
+    """1, 2, 4, ... вплоть до числа ядер"""
+    cores = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cores:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cores:
+        workers.append(cores)
+    return workers
+
+
+def run_client(base_url: str, paths: List[str], duration: float) -> int:
+    """Отправляет запросы по кругу, возвращает число успешных ответов"""
+    deadline = time.monotonic() + duration
+    done = 0
+    i = 0
+    while time.monotonic() < deadline:
+        # Новое соединение на каждый запрос: в режиме нескольких воркеров
+        # keep-alive соединения uvicorn получают задержку ~40 мс (Nagle/ACK)
+        response = requests.get(base_url + paths[i % len(paths)])
+        if response.status_code == 200:
+            done += 1
+        i += 1
+    return done
+
+
+def wait_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API не запустился")
+
+
+def benchmark(workers: int, args) -> float:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = dict(
+        os.environ,
+        API_HOST="127.0.0.1",
+        API_PORT=str(args.port),
+        API_WORKERS=str(workers),
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT_DIR, "api", "main.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(base_url)
+        # Прогрев: заполнение общего кэша
+        run_client(base_url, args.paths, 1.0)
+
+        with ProcessPoolExecutor(args.clients) as pool:
+            futures = [
+                pool.submit(run_client, base_url, args.paths, args.duration)
+                for _ in range(args.clients)
+            ]
+            total = sum(f.result() for f in futures)
+        return total / args.duration
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument(
+        "--paths",
+        nargs="+",
+        default=["/api/current", "/api/chart?hours=24"],
+        help="endpoints, которые опрашивают клиенты",
+    )
+    args = parser.parse_args()
+
+    print(f"Ядер: {os.cpu_count()}, клиентов: {args.clients}")
+    baseline = None
+    for workers in args.workers:
+        rps = benchmark(workers, args)
+        baseline = baseline or rps
+        print(f"workers={workers:<3} {rps:10.1f} req/s  x{rps / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,59 @@ import io
 import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Literal, Optional
 
 import dotenv
 import matplotlib
 import matplotlib.pyplot as plt
-from fastapi import Depends, FastAPI, HTTPException
+import orjson
+from brotli_asgi import BrotliMiddleware
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
 
-from shared.database import create_tables, get_db
-from shared.models import WeatherData
+from shared.cache import SQLiteCache
+from shared.database import create_tables, engine, get_db
+from shared.models import Reading
 
 matplotlib.use("Agg")
 
 dotenv.load_dotenv()
 
+# Кэш ответов, общий для всех воркеров API
+cache = SQLiteCache(
+    os.getenv("API_CACHE_PATH", "api_cache.db"),
+    ttl=float(os.getenv("API_CACHE_TTL", "300")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Каждый воркер - отдельный процесс, импортирующий приложение заново,
+    # со своим движком БД и соединением к кэшу; при остановке они закрываются
+    yield
+    cache.close()
+    engine.dispose()
+
+
 app = FastAPI(
     title="Weather Station API",
     description="API для получения данных о температуре и влажности",
     version="1.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"])
+# Сжатие ответов: brotli, если клиент поддерживает, иначе gzip
+app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
 
 # Настройка логирования
 logging.basicConfig(
@@ -51,6 +76,72 @@ class WeatherHistoryResponse(BaseModel):
     stats: Dict[str, float]
 
 
+def _version_headers(db: Session, since: Optional[datetime] = None) -> Dict[str, str]:
+    """ETag и Last-Modified по версии данных
+
+    Версия - время последней записи, а для окна истории еще время первой
+    записи в окне и число записей в нем. Все запросы идут по индексам.
+    """
+    latest = db.query(func.max(Reading.timestamp)).scalar()
+    if latest is None:
+        return {}
+
+    version = _version_key(latest)
+    if since is not None:
+        # Окно сдвигается со временем, а импорт и перенос из spool добавляют
+        # записи внутрь окна, поэтому учитываем его начало и размер
+        window = db.query(Reading.timestamp).filter(Reading.timestamp >= since)
+        first = window.with_entities(func.min(Reading.timestamp)).scalar()
+        count = window.with_entities(func.count()).scalar()
+        if first is not None:
+            version += f"-{_version_key(first)}-{count}"
+
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+
+    return {
+        "ETag": f'W/"{version}"',
+        "Last-Modified": format_datetime(latest, usegmt=True),
+    }
+
+
+def _version_key(value: datetime) -> str:
+    """Время записи для ETag, в микросекундах epoch"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return str(int(value.timestamp() * 1_000_000))
+
+
+def _cache_key(name: str, headers: Dict[str, str]) -> str:
+    """Ключ общего кэша с учетом таблицы и версии данных"""
+    return f"{Reading.__tablename__}:{name}:{headers.get('ETag')}"
+
+
+def _is_not_modified(
+    request: Request, headers: Dict[str, str], check_modified_since: bool = True
+) -> bool:
+    """Проверяет If-None-Match / If-Modified-Since запроса"""
+    if not headers:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Слабое сравнение ETag (RFC 9110, 13.1.2)
+        etag = headers["ETag"].removeprefix("W/")
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if check_modified_since and if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+    return False
+
+
 @app.get("/")
 async def read_root():
     return {"message": "Weather Station API"}
@@ -65,18 +156,33 @@ async def read_root():
         500: {"description": "Ошибка сервера"},
     },
 )
-async def get_current_weather(db: Session = Depends(get_db)):
+async def get_current_weather(request: Request, db: Session = Depends(get_db)):
     """Получить последние данные"""
     try:
-        latest = db.query(WeatherData).order_by(desc(WeatherData.timestamp)).first()
-        if not latest:
-            raise HTTPException(status_code=404, detail="No weather data available")
+        headers = _version_headers(db)
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+
+        # Версия данных входит в ключ, поэтому устаревшие записи не отдаются
+        cache_key = _cache_key("current", headers)
+        payload = cache.get(cache_key) if headers else None
+        if payload is None:
+            latest = db.query(Reading).order_by(desc(Reading.timestamp)).first()
+            if not latest:
+                raise HTTPException(
+                    status_code=404, detail="No weather data available"
+                )
 
-        return {
-            "temperature": latest.temperature,
-            "humidity": latest.humidity,
-            "timestamp": latest.timestamp.isoformat(),
-        }
+            payload = orjson.dumps(
+                {
+                    "temperature": latest.temperature,
+                    "humidity": latest.humidity,
+                    "timestamp": latest.timestamp.isoformat(),
+                }
+            )
+            cache.set(cache_key, payload)
+
+        return Response(content=payload, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception:
@@ -85,19 +191,36 @@ async def get_current_weather(db: Session = Depends(get_db)):
 
 @app.get("/api/history", response_model=WeatherHistoryResponse)
 async def get_weather_history(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     hours: int = 24,  # По умолчанию последние 24 часа
+    format: Literal["rows", "columns"] = "rows",
 ):
-    """Получить историю данных с статистикой"""
+    """Получить историю данных с статистикой
+
+    format=columns возвращает данные по столбцам
+    ({"t": [...], "temperature": [...], "humidity": [...]}, t - epoch секунды)
+    без построчной валидации моделью ответа.
+    """
     try:
         since = datetime.now(timezone.utc).replace(tzinfo=timezone.utc) - timedelta(
             hours=hours
         )
 
+        headers = _version_headers(db, since)
+        # Last-Modified не учитывает выпадение старых записей из окна,
+        # поэтому для истории ориентируемся только на ETag
+        if _is_not_modified(request, headers, check_modified_since=False):
+            return Response(status_code=304, headers=headers)
+
+        if format == "columns":
+            return _history_columns(db, since, hours, headers)
+
         records = (
-            db.query(WeatherData)
-            .filter(WeatherData.timestamp >= since)
-            .order_by(WeatherData.timestamp)
+            db.query(Reading)
+            .filter(Reading.timestamp >= since)
+            .order_by(Reading.timestamp)
             .all()
         )
 
@@ -108,16 +231,7 @@ async def get_weather_history(
         temps: list = [r.temperature for r in records]
         humids: list = [r.humidity for r in records]
 
-        stats = {
-            "avg_temperature": sum(temps) / len(temps),
-            "max_temperature": max(temps),
-            "min_temperature": min(temps),
-            "avg_humidity": sum(humids) / len(humids),
-            "max_humidity": max(humids),
-            "min_humidity": min(humids),
-            "records_count": len(records),
-        }
-
+        response.headers.update(headers)
         return {
             "period": f"last_{hours}_hours",
             "data": [
@@ -128,15 +242,69 @@ async def get_weather_history(
                 }
                 for r in records
             ],
-            "stats": stats,
+            "stats": _calculate_stats(temps, humids),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching history: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
 
+def _calculate_stats(temps: list, humids: list) -> Dict[str, float]:
+    """Статистика по температуре и влажности за период"""
+    return {
+        "avg_temperature": sum(temps) / len(temps),
+        "max_temperature": max(temps),
+        "min_temperature": min(temps),
+        "avg_humidity": sum(humids) / len(humids),
+        "max_humidity": max(humids),
+        "min_humidity": min(humids),
+        "records_count": len(temps),
+    }
+
+
+def _epoch(value: datetime) -> int:
+    """Переводит время из БД (наивное UTC или aware) в epoch секунды"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _history_columns(
+    db: Session, since: datetime, hours: int, headers: Dict[str, str]
+) -> Response:
+    """История в столбцовом формате, сериализуется напрямую через orjson"""
+    # Выбираем только нужные столбцы, без создания ORM-объектов
+    rows = (
+        db.query(Reading.timestamp, Reading.temperature, Reading.humidity)
+        .filter(Reading.timestamp >= since)
+        .order_by(Reading.timestamp)
+        .all()
+    )
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="No data for this period")
+
+    timestamps, temps, humids = (list(column) for column in zip(*rows))
+
+    payload = orjson.dumps(
+        {
+            "period": f"last_{hours}_hours",
+            "data": {
+                "t": [_epoch(t) for t in timestamps],
+                "temperature": temps,
+                "humidity": humids,
+            },
+            "stats": _calculate_stats(temps, humids),
+        }
+    )
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
 @app.get("/api/chart")
 async def generate_temperature_chart(
+    request: Request,
     db: Session = Depends(get_db),
     hours: int = 24,
     chart_type: str = "both",  # 'temperature', 'humidity', 'both'
@@ -147,10 +315,22 @@ async def generate_temperature_chart(
             tzinfo=timezone.utc
         ) - timedelta(hours=hours)
 
+        headers = _version_headers(db, since)
+        if _is_not_modified(request, headers, check_modified_since=False):
+            return Response(status_code=304, headers=headers)
+
+        # Готовый график переиспользуется всеми воркерами, пока данные не изменятся
+        cache_key = _cache_key(f"chart:{hours}:{chart_type}", headers)
+        payload = cache.get(cache_key) if headers else None
+        if payload is not None:
+            return Response(
+                content=payload, media_type="application/json", headers=headers
+            )
+
         records = (
-            db.query(WeatherData)
-            .filter(WeatherData.timestamp >= since)
-            .order_by(WeatherData.timestamp)
+            db.query(Reading)
+            .filter(Reading.timestamp >= since)
+            .order_by(Reading.timestamp)
             .all()
         )
 
@@ -237,7 +417,9 @@ async def generate_temperature_chart(
         buf.seek(0)
 
         image_base64 = base64.b64encode(buf.read()).decode("utf-8")
-        return {"image": f"data:image/png;base64,{image_base64}"}
+        payload = orjson.dumps({"image": f"data:image/png;base64,{image_base64}"})
+        cache.set(cache_key, payload)
+        return Response(content=payload, media_type="application/json", headers=headers)
 
     except HTTPException:
         raise
@@ -263,10 +445,22 @@ def main():
         logger.error("API_HOST/API_PORT environment variable is required")
         return
     port = int(port)
+    workers = int(os.getenv("API_WORKERS", "1"))
 
     create_tables()
 
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    if workers > 1:
+        # Для нескольких воркеров uvicorn импортирует приложение в каждом процессе
+        uvicorn.run(
+            "api.main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            app_dir=ROOT_DIR,
+            log_level="info",
+        )
+    else:
+        uvicorn.run(app, host=host, port=port, log_level="info")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ import base64
 import logging
 import os
 from io import BytesIO
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import dotenv
 import requests
@@ -23,13 +23,26 @@ API_URL = f"http://{API_HOST}:{API_PORT}"
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
 
+# Последний ответ /api/current и его ETag для условных запросов
+_current_cache: Dict[str, Any] = {"etag": None, "data": None}
+
+
 def fetch_weather_data() -> Optional[Dict]:
     """Асинхронное получение данных о погоде из API"""
     try:
-        response = requests.get(f"{API_URL}/api/current")
+        headers = {}
+        if _current_cache["etag"]:
+            headers["If-None-Match"] = _current_cache["etag"]
+
+        response = requests.get(f"{API_URL}/api/current", headers=headers)
+        if response.status_code == 304:
+            logger.info("Данные API не изменились, используется кэш")
+            return _current_cache["data"]
         if response.status_code == 200:
             data = response.json()
             logger.info(f"Получены данные от API: {data}")
+            _current_cache["etag"] = response.headers.get("ETag")
+            _current_cache["data"] = data
             return data
         else:
             logger.warning(f"API вернул статус {response.status_code}")
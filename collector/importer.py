@@ -0,0 +1,197 @@
+"""Импорт показаний из CSV/NDJSON файлов (SD-карта, другая станция)
+
+Запуск из корня проекта:
+
+    python -m collector.importer data.csv [data2.ndjson ...] [--chunk-size N]
+
+Файл должен содержать столбцы timestamp, temperature, humidity. Время - ISO 8601
+(без часового пояса считается UTC) или секунды epoch; показания раньше 2000 года
+или из будущего считаются некорректными. Файлы читаются пачками, поэтому объем
+памяти не зависит от размера файла.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterator
+
+import pandas as pd
+from sqlalchemy import select
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.database import SessionLocal, create_tables, insert_ignore
+from shared.models import (
+    HUMIDITY_LIMITS,
+    TEMPERATURE_LIMITS,
+    CompactWeatherData,
+    Reading,
+)
+
+logger = logging.getLogger("data_importer")
+
+COLUMNS = ["timestamp", "temperature", "humidity"]
+
+# Допустимый диапазон времени показаний: более ранние значения и время из
+# будущего (сбитые часы станции, миллисекунды вместо секунд) отбрасываются
+EARLIEST_TIMESTAMP = pd.Timestamp("2000-01-01", tz="UTC")
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)
+
+
+def read_chunks(path: str, file_format: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Читает файл пачками по chunk_size строк"""
+    if file_format == "csv":
+        return pd.read_csv(path, usecols=COLUMNS, chunksize=chunk_size)
+    return pd.read_json(path, lines=True, chunksize=chunk_size, convert_dates=False)
+
+
+def detect_format(path: str) -> str:
+    name = path.lower().removesuffix(".gz")
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    raise ValueError(f"Не удалось определить формат файла: {path}")
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Приводит типы и отбрасывает некорректные строки"""
+    missing = set(COLUMNS) - set(chunk.columns)
+    if missing:
+        raise ValueError(f"В файле нет столбцов: {', '.join(sorted(missing))}")
+
+    earliest = EARLIEST_TIMESTAMP
+    latest = pd.Timestamp.now(tz="UTC") + MAX_CLOCK_SKEW
+
+    # Секунды epoch и строки ISO 8601 могут встречаться в одной пачке
+    epoch = pd.to_numeric(chunk["timestamp"], errors="coerce")
+    is_text = epoch.isna()
+    # Границы проверяются до to_datetime: огромные числа в нем переполняются
+    epoch = epoch.where(epoch.between(earliest.timestamp(), latest.timestamp()))
+    timestamps = pd.to_datetime(epoch, unit="s", utc=True, errors="coerce")
+    if is_text.any():
+        timestamps[is_text] = pd.to_datetime(
+            chunk["timestamp"][is_text].astype(str),
+            utc=True,
+            errors="coerce",
+            format="mixed",
+        )
+    timestamps = timestamps.where(timestamps.between(earliest, latest))
+
+    df = pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "temperature": pd.to_numeric(chunk["temperature"], errors="coerce"),
+            "humidity": pd.to_numeric(chunk["humidity"], errors="coerce"),
+        }
+    ).dropna()
+
+    # Те же физические пределы, что и при чтении с Arduino
+    df = df[
+        df["temperature"].between(*TEMPERATURE_LIMITS)
+        & df["humidity"].between(*HUMIDITY_LIMITS)
+    ]
+
+    if Reading is CompactWeatherData:
+        # В компактном хранилище время хранится с точностью до секунды
+        df = df.assign(timestamp=df["timestamp"].dt.floor("s"))
+
+    return df
+
+
+def drop_existing(db, df: pd.DataFrame) -> pd.DataFrame:
+    """Убирает показания, время которых уже есть в БД"""
+    if df.empty:
+        return df
+
+    # Границы пачки - наивное UTC, как в WeatherData.timestamp
+    existing = db.scalars(
+        select(Reading.timestamp).where(
+            Reading.timestamp.between(
+                df["timestamp"].min().tz_localize(None).to_pydatetime(),
+                df["timestamp"].max().tz_localize(None).to_pydatetime(),
+            )
+        )
+    ).all()
+    if not existing:
+        return df
+
+    # Наивное время из БД считается UTC
+    return df[~df["timestamp"].isin(pd.to_datetime(existing, utc=True))]
+
+
+def import_file(path: str, file_format: str, chunk_size: int) -> Dict[str, int]:
+    """Импортирует файл, каждая пачка - отдельная транзакция"""
+    counters = {"read": 0, "invalid": 0, "duplicate": 0, "inserted": 0}
+    db = SessionLocal()
+    try:
+        for chunk in read_chunks(path, file_format, chunk_size):
+            counters["read"] += len(chunk)
+
+            df = clean_chunk(chunk)
+            counters["invalid"] += len(chunk) - len(df)
+
+            new = drop_existing(db, df.drop_duplicates("timestamp"))
+            counters["duplicate"] += len(df) - len(new)
+            if new.empty:
+                continue
+
+            # Время в БД хранится как наивное UTC (см. WeatherData.timestamp)
+            rows = [
+                {"timestamp": ts, "temperature": temp, "humidity": hum}
+                for ts, temp, hum in zip(
+                    new["timestamp"].dt.tz_localize(None).dt.to_pydatetime(),
+                    new["temperature"].tolist(),
+                    new["humidity"].tolist(),
+                )
+            ]
+            db.execute(insert_ignore(Reading), rows)
+            db.commit()
+
+            counters["inserted"] += len(rows)
+            logger.info(f"{path}: импортировано {counters['inserted']} записей")
+    except Exception as e:
+        logger.error(f"Ошибка импорта {path}: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return counters
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="CSV или NDJSON файлы (можно .gz)")
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        help="формат файлов (по умолчанию - по расширению)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    create_tables()
+
+    for path in args.files:
+        started = time.monotonic()
+        counters = import_file(
+            path, args.format or detect_format(path), args.chunk_size
+        )
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{path}: прочитано {counters['read']}, добавлено {counters['inserted']}, "
+            f"некорректных {counters['invalid']}, дубликатов {counters['duplicate']} "
+            f"за {elapsed:.1f} сек"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,18 @@ import logging
 import os
 import sys
 import time
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
 import dotenv
 import serial
+from sqlalchemy import select
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database import SessionLocal, create_tables
-from shared.models import WeatherData
+from collector.spool import Spool, SpoolReplayer
+from shared.database import SessionLocal, create_tables, insert_ignore
+from shared.models import HUMIDITY_LIMITS, TEMPERATURE_LIMITS, Reading
 
 dotenv.load_dotenv()
 
@@ -89,7 +92,10 @@ class ArduinoReader:
                 return None
 
             # Валидация физических пределов
-            if not (-50 <= data["temperature"] <= 60 and 0 <= data["humidity"] <= 100):
+            if not (
+                TEMPERATURE_LIMITS[0] <= data["temperature"] <= TEMPERATURE_LIMITS[1]
+                and HUMIDITY_LIMITS[0] <= data["humidity"] <= HUMIDITY_LIMITS[1]
+            ):
                 logger.warning(f"Некорректные значения: {data}")
                 return None
 
@@ -100,16 +106,39 @@ class ArduinoReader:
             return None
 
 
-def save_weather_data(temperature: float, humidity: float):
-    """Сохраняет данные в базу с обработкой ошибок"""
+def save_weather_batch(records: List[Dict]):
+    """Сохраняет пачку показаний из spool одной транзакцией"""
+    # Время в БД хранится как наивное UTC (см. WeatherData.timestamp)
+    rows = {
+        datetime.fromtimestamp(r["timestamp"], timezone.utc).replace(tzinfo=None): {
+            "temperature": r["temperature"],
+            "humidity": r["humidity"],
+        }
+        for r in records
+    }
+
     db = SessionLocal()
     try:
-        record = WeatherData(temperature=temperature, humidity=humidity)
-        db.add(record)
-        db.commit()
-        logger.info(f"Сохранено: {temperature}°C, {humidity}%")
-    except Exception as e:
-        logger.error(f"Ошибка сохранения в БД: {e}")
+        # После сбоя пачка может быть перенесена повторно: пропускаем показания,
+        # время которых уже есть в БД (у legacy-таблицы нет уникального ключа
+        # по времени, в compact дубликаты отсекает еще и insert_ignore)
+        existing = db.scalars(
+            select(Reading.timestamp).where(
+                Reading.timestamp.between(min(rows), max(rows))
+            )
+        ).all()
+        for ts in existing:
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+            rows.pop(ts, None)
+
+        if rows:
+            db.execute(
+                insert_ignore(Reading),
+                [{"timestamp": ts, **values} for ts, values in rows.items()],
+            )
+            db.commit()
+    except Exception:
         db.rollback()
         raise
     finally:
@@ -123,9 +152,6 @@ def main():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    # Создаем таблицы при первом запуске
-    create_tables()
-
     port = os.getenv("ARDUINO_PORT")
     if not port:
         logger.error("ARDUINO_PORT не указан в .env")
@@ -133,6 +159,13 @@ def main():
 
     logger.info("Запуск сборщика метеоданных...")
 
+    # Показания сначала пишутся в локальный spool, а в БД переносятся в фоне,
+    # поэтому сбор не останавливается, если БД заблокирована или недоступна.
+    # Таблицы создаются фоновым потоком, когда БД станет доступна
+    spool = Spool(os.getenv("SPOOL_PATH", "collector_spool.bin"))
+    replayer = SpoolReplayer(spool, save_weather_batch, setup=create_tables)
+    replayer.start()
+
     try:
         with ArduinoReader(port) as reader:
             # Тестовое чтение
@@ -147,7 +180,16 @@ def main():
             while True:
                 data = reader.read_single_reading()
                 if data:
-                    save_weather_data(data["temperature"], data["humidity"])
+                    spool.append(
+                        {
+                            "timestamp": time.time(),
+                            "temperature": data["temperature"],
+                            "humidity": data["humidity"],
+                        }
+                    )
+                    logger.info(
+                        f"Получено: {data['temperature']}°C, {data['humidity']}%"
+                    )
                 else:
                     logger.warning("Нет валидных данных в этом цикле")
 
@@ -157,6 +199,9 @@ def main():
         logger.info("Сборщик остановлен пользователем")
     except Exception as e:
         logger.error(f"Критическая ошибка: {e}")
+    finally:
+        replayer.stop()
+        spool.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("data_collector.spool")
+
+# Заголовок записи: длина данных и их CRC32
+HEADER = struct.Struct(">II")
+
+
+class Spool:
+    """Append-only файл для показаний, которые еще не попали в БД
+
+    Записи хранятся с префиксом длины и контрольной суммой, позиция
+    последней перенесенной в БД записи - в соседнем файле ``.offset``.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 10, fsync_interval: float = 5.0):
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._has_data = threading.Event()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        size = self._recover()
+        self._file = open(self.path, "ab")
+        self._offset = self._read_offset(size)
+        if self._offset < size:
+            self._has_data.set()
+
+    def _recover(self) -> int:
+        """Обрезает недописанную или поврежденную запись в конце файла"""
+        if not os.path.exists(self.path):
+            return 0
+
+        valid_size = 0
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, checksum = HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                valid_size = f.tell()
+
+        if valid_size < os.path.getsize(self.path):
+            logger.warning(
+                f"Spool {self.path}: отброшен поврежденный хвост "
+                f"после {valid_size} байт"
+            )
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_size)
+                os.fsync(f.fileno())
+        return valid_size
+
+    def _read_offset(self, size: int) -> int:
+        try:
+            with open(self.offset_path) as f:
+                offset = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+        # Файл мог быть обрезан после последнего сохранения позиции
+        return offset if 0 <= offset <= size else 0
+
+    def _write_offset(self, offset: int):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record: Dict):
+        """Добавляет запись; fsync выполняется пакетно"""
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._file.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+        self._has_data.set()
+
+    def sync(self):
+        """Принудительно сбрасывает записанные данные на диск"""
+        with self._lock:
+            self._sync()
+
+    def read_pending(self, limit: int) -> Tuple[List[Dict], int]:
+        """Возвращает до limit еще не перенесенных записей и позицию после них"""
+        records: List[Dict] = []
+        with self._lock, open(self.path, "rb") as f:
+            f.seek(self._offset)
+            while len(records) < limit:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, _ = HEADER.unpack(header)
+                records.append(json.loads(f.read(length)))
+            return records, f.tell() if records else self._offset
+
+    def commit(self, offset: int):
+        """Отмечает записи до offset как перенесенные в БД"""
+        with self._lock:
+            if offset >= self._file.tell():
+                # Все перенесено: очищаем файл, чтобы он не рос бесконечно
+                self._sync()
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+                offset = 0
+            self._offset = offset
+            self._write_offset(offset)
+
+    def wait(self, timeout: float) -> bool:
+        """Ожидает появления новых записей"""
+        has_data = self._has_data.wait(timeout)
+        self._has_data.clear()
+        return has_data
+
+    def wake(self):
+        """Прерывает ожидание в wait()"""
+        self._has_data.set()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+
+class SpoolReplayer(threading.Thread):
+    """Фоновый перенос записей из spool в БД пачками"""
+
+    def __init__(
+        self,
+        spool: Spool,
+        writer: Callable[[List[Dict]], None],
+        setup: Optional[Callable[[], None]] = None,
+        batch_size: int = 500,
+        poll_interval: float = 5.0,
+        max_retry_delay: float = 60.0,
+    ):
+        super().__init__(name="spool-replayer", daemon=True)
+        self.spool = spool
+        self.writer = writer
+        # Подготовка БД (создание таблиц) перед первой записью
+        self.setup = setup
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_retry_delay = max_retry_delay
+        self._stop_event = threading.Event()
+
+    def run(self):
+        retry_delay = 1.0
+        while not self._stop_event.is_set():
+            # Любая ошибка (БД, чтение spool, запись .offset) не должна
+            # останавливать поток: пишем в лог и повторяем с задержкой
+            try:
+                records, offset = self.spool.read_pending(self.batch_size)
+                if not records:
+                    self.spool.sync()
+                    self.spool.wait(self.poll_interval)
+                    continue
+
+                if self.setup is not None:
+                    self.setup()
+                    self.setup = None
+                self.writer(records)
+                self.spool.commit(offset)
+            except Exception as e:
+                logger.error(
+                    f"Ошибка переноса spool в БД, "
+                    f"повтор через {retry_delay:.0f} сек: {e}"
+                )
+                self._stop_event.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                continue
+
+            retry_delay = 1.0
+            logger.info(f"Из spool перенесено в БД записей: {len(records)}")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        self.spool.wake()
+        self.join(timeout)
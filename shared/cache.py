@@ -0,0 +1,76 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCache:
+    """Кэш ключ-значение в файле SQLite, общий для всех процессов API
+
+    Каждый процесс открывает свое соединение; WAL позволяет читать
+    параллельно с записью из других воркеров. Ошибки кэша не пробрасываются:
+    get() возвращает промах, set() ничего не сохраняет.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, purge_interval: float = 60.0):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # Кэш можно потерять
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT value FROM cache WHERE key = ? AND expires > ?",
+                        (key, time.time()),
+                    )
+                    .fetchone()
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка чтения кэша: {e}")
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, now + (ttl if ttl is not None else self.ttl)),
+                )
+                if now - self._last_purge >= self.purge_interval:
+                    conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                    self._last_purge = now
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка записи в кэш: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,116 @@
+"""Перенос показаний из weather_data в компактную таблицу weather_data_compact
+
+Запуск из корня проекта:
+
+    python -m shared.convert_storage [--batch-size N] [--drop-legacy] [--vacuum]
+
+После переноса укажите STORAGE_FORMAT=compact в .env.
+"""
+
+import argparse
+import logging
+from typing import Tuple
+
+from sqlalchemy import select, text
+
+from .database import SessionLocal, create_tables, engine, insert_ignore
+from .models import CompactWeatherData, WeatherData
+
+logger = logging.getLogger("convert_storage")
+
+
+def convert(batch_size: int = 10000) -> Tuple[int, int]:
+    """Копирует все записи пачками, возвращает число прочитанных и добавленных"""
+    db = SessionLocal()
+    read = 0
+    inserted = 0
+    last_id = 0
+    try:
+        while True:
+            # Постраничный проход по первичному ключу без OFFSET
+            rows = db.execute(
+                select(
+                    WeatherData.id,
+                    WeatherData.timestamp,
+                    WeatherData.temperature,
+                    WeatherData.humidity,
+                )
+                .where(WeatherData.id > last_id, WeatherData.timestamp.is_not(None))
+                .order_by(WeatherData.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            # Наивные timestamp в weather_data записаны в UTC (datetime.utcnow);
+            # показания с одинаковой секундой схлопываются в одно. Вставка через
+            # таблицу, а не ORM-модель, чтобы получить число добавленных строк
+            result = db.execute(
+                insert_ignore(CompactWeatherData.__table__),
+                [
+                    {
+                        "ts": r.timestamp,
+                        "temperature": r.temperature,
+                        "humidity": r.humidity,
+                    }
+                    for r in rows
+                ],
+            )
+            db.commit()
+
+            last_id = rows[-1].id
+            read += len(rows)
+            inserted += result.rowcount
+            logger.info(f"Прочитано записей: {read}, добавлено: {inserted}")
+    except Exception as e:
+        logger.error(f"Ошибка переноса данных: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return read, inserted
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help="удалить данные из weather_data после переноса",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="выполнить VACUUM, чтобы уменьшить файл SQLite",
+    )
+    args = parser.parse_args()
+
+    create_tables()
+    read, inserted = convert(args.batch_size)
+    logger.info(f"Перенос завершен, прочитано: {read}, добавлено: {inserted}")
+    if inserted != read:
+        logger.warning(
+            f"Не добавлено записей: {read - inserted} (показания с тем же "
+            "временем до секунды уже есть в weather_data_compact)"
+        )
+
+    if args.drop_legacy:
+        with engine.begin() as conn:
+            conn.execute(WeatherData.__table__.delete())
+        logger.info("Данные weather_data удалены")
+
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        logger.info("VACUUM выполнен")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ import os
 import time
 
 import dotenv
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, Insert, create_engine, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 dotenv.load_dotenv()
@@ -12,32 +13,20 @@ class Base(DeclarativeBase):
     pass
 
 
-def create_engine_with_retry(database_url: str, max_retries: int = 3) -> Engine:
-    """Создает движок БД с повторными попытками"""
-    for attempt in range(max_retries):
-        try:
-            engine = create_engine(
-                database_url,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,  # Проверка соединения перед использованием
-            )
-
-            with engine.connect():
-                pass
-            return engine
-        except Exception:
-            if attempt == max_retries - 1:
-                raise
-            time.sleep(2**attempt)
-
-    raise RuntimeError("Не удалось подключиться к БД после нескольких попыток")
+def create_db_engine(database_url: str) -> Engine:
+    """Создает движок БД; соединение открывается при первом использовании"""
+    return create_engine(
+        database_url,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,  # Проверка соединения перед использованием
+    )
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL is None:
     raise RuntimeError("DATABASE_URL переменная среды отсутствует")
-engine = create_engine_with_retry(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -49,5 +38,31 @@ def get_db():
         db.close()
 
 
+def wait_for_db(max_retries: int = 3):
+    """Ожидает доступности БД с повторными попытками"""
+    for attempt in range(max_retries):
+        try:
+            with engine.connect():
+                return
+        except Exception:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(2**attempt)
+
+
 def create_tables():
+    wait_for_db()
     Base.metadata.create_all(bind=engine)
+    # create_all не добавляет новые индексы в уже существующие таблицы
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def insert_ignore(model) -> Insert:
+    """INSERT, пропускающий строки с уже существующим первичным ключом"""
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return insert(model)
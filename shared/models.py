@@ -1,10 +1,69 @@
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 from typing import Dict
 
-from sqlalchemy import CheckConstraint, Column, DateTime, Float, Integer
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    SmallInteger,
+    TypeDecorator,
+)
 
 from .database import Base
 
+# Физические пределы показаний (совпадают с ограничениями в БД)
+TEMPERATURE_LIMITS = (-50, 60)
+HUMIDITY_LIMITS = (0, 100)
+
+
+class EpochSeconds(TypeDecorator):
+    """Время в UTC, хранимое как целое число секунд epoch
+
+    Наивные datetime считаются UTC, при чтении возвращается aware datetime.
+    """
+
+    # BIGINT в PostgreSQL (INTEGER там переполнится в 2038 году),
+    # INTEGER в SQLite, чтобы первичный ключ оставался rowid
+    impl = Integer().with_variant(BigInteger(), "postgresql")
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value, timezone.utc)
+
+
+class FixedPoint(TypeDecorator):
+    """Число с фиксированной точкой, хранимое как целое value * scale"""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, scale: int = 10):
+        super().__init__()
+        self.scale = scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return round(value * self.scale)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / self.scale
+
 
 class WeatherData(Base):
     __tablename__ = "weather_data"
@@ -12,7 +71,7 @@ class WeatherData(Base):
     id = Column(Integer, primary_key=True, index=True)
     temperature = Column(Float, nullable=False)
     humidity = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
     __table_args__ = (
         CheckConstraint(
@@ -29,3 +88,48 @@ class WeatherData(Base):
             "humidity": self.humidity,
             "timestamp": self.timestamp.isoformat(),
         }
+
+
+class CompactWeatherData(Base):
+    """Компактное хранение показаний
+
+    Первичный ключ - время в секундах epoch (в SQLite это rowid, отдельный
+    индекс не нужен), температура и влажность - целые с шагом 0.1.
+    """
+
+    __tablename__ = "weather_data_compact"
+
+    timestamp = Column(
+        "ts",
+        EpochSeconds,
+        primary_key=True,
+        autoincrement=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    temperature = Column(FixedPoint(10), nullable=False)
+    humidity = Column(FixedPoint(10), nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(
+            "temperature BETWEEN -500 AND 600", name="reasonable_temperature_compact"
+        ),
+        CheckConstraint(
+            "humidity BETWEEN 0 AND 1000", name="reasonable_humidity_compact"
+        ),
+    )
+
+    def to_dict(self) -> Dict:
+        """Конвертирует запись в словарь для API"""
+        return {
+            "temperature": self.temperature,
+            "humidity": self.humidity,
+            "timestamp": self.timestamp.isoformat(),
+        }
+
+
+# Модель, с которой работают API и сборщик: legacy (по умолчанию) или compact
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "legacy")
+if STORAGE_FORMAT not in ("legacy", "compact"):
+    raise RuntimeError(f"Неизвестный STORAGE_FORMAT: {STORAGE_FORMAT}")
+
+Reading = CompactWeatherData if STORAGE_FORMAT == "compact" else WeatherData